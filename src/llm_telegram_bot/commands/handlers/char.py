@@ -1,11 +1,12 @@
 # src/llm_telegram_bot/commands/handlers/char.py
 
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Any, List
 
 from llm_telegram_bot.commands.commands_registry import register_command
-from llm_telegram_bot.session.history_manager import Message
+from llm_telegram_bot.session.history_manager import Message, _parse_ts
 from llm_telegram_bot.session.session_manager import (
     get_active_char,
     get_session,
@@ -99,9 +100,10 @@ async def char_handler(session: Any, message: dict, args: List[str]):
         last_ts = datetime.fromisoformat(state.last_load_ts)
 
         for msg in session.history_mgr.tier0:
-            # Parse your msg.ts into a datetime
+            # Parse your msg.ts into a datetime (cached on the message when
+            # the HistoryManager saw it; fromisoformat otherwise)
             try:
-                msg_ts = datetime.strptime(msg.ts, "%Y-%m-%d_%H-%M-%S")
+                msg_ts = msg.ts_dt or _parse_ts(msg.ts)
             except ValueError:
                 logger.warning(f"Couldn’t parse msg.ts: {msg.ts}, skipping")
                 continue
@@ -122,7 +124,7 @@ async def char_handler(session: Any, message: dict, args: List[str]):
         if new_entries:
             logger.debug(f"[CharSwitch] New entries to flush: {len(new_entries)}")
             # prime the session buffer with only those new entries
-            state.history_buffer = new_entries
+            state.history_buffer = deque(new_entries)
             path = state.flush_history_to_disk()  # this clears history_buffer
             await session.send_message(
                 f"🔄 Flushed {len(new_entries)} new messages to <code>{path}</code>",
@@ -133,10 +135,8 @@ async def char_handler(session: Any, message: dict, args: List[str]):
     set_active_char(session.chat_id, session.bot_name, choice)
     await session.send_message(f"✅ Switched character to `{choice}`")
 
-    # 3c) Clear in-memory tiers so we start fresh
-    session.history_mgr.tier0.clear()
-    session.history_mgr.tier1.clear()
-    session.history_mgr.tier2.clear()
+    # 3c) Clear in-memory tiers (and their token counters) so we start fresh
+    session.history_mgr.clear()
 
     # 3d) Load the new combo’s history from disk
     try:
@@ -63,13 +63,12 @@ async def history_handler(session: Any, message: dict, args: List[str]):
     # ─── LOAD ────────────────────────────────────────
     if cmd == "load":
         try:
-            # 1) load into sess.history_buffer (list of dicts)
-            path = sess.load_history_from_disk()
+            # 1) clear out any existing in-memory tiers (and the token
+            #    counters derived from them) before re-seeding
+            mgr.clear()
 
-            # 2) clear out any existing in-memory tiers
-            mgr.tier0.clear()
-            mgr.tier1.clear()
-            mgr.tier2.clear()
+            # 2) load from disk; this seeds the manager via add_*
+            path = sess.load_history_from_disk()
 
             # 3) reconstruct Message objects (with both raw & compressed)
             from llm_telegram_bot.session.history_manager import Message
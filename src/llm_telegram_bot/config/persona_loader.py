@@ -13,8 +13,25 @@ logger = logging.getLogger(__name__)
 _CHAR_DIR = Path("config/chars")
 _USER_DIR = Path("config/users")
 
-_char_cache: Dict[str, Dict[str, Any]] = {}
-_user_cache: Dict[str, Dict[str, Any]] = {}
+# raw YAML caches, keyed on persona key and holding (mtime_ns, data) so
+# an edited file is picked up without restarting the bot
+_char_cache: Dict[str, tuple[int, Dict[str, Any]]] = {}
+_user_cache: Dict[str, tuple[int, Dict[str, Any]]] = {}
+
+# rendered-config caches, keyed on (own key, partner's key): the Jinja
+# render only depends on that pair, and both cardinalities are tiny.
+# functools.cache would not take the dict argument, hence manual dicts.
+_char_render_cache: Dict[tuple, Dict[str, Any]] = {}
+_user_render_cache: Dict[tuple, Dict[str, Any]] = {}
+
+# bumped whenever a persona file is (re)parsed, so downstream caches
+# built from persona contents (e.g. the prompt-block cache in
+# message_utils) can tell a reload happened without holding object refs
+_generation = 0
+
+
+def persona_generation() -> int:
+    return _generation
 
 
 def _load_yaml(path: Path) -> Dict[str, Any]:
@@ -72,17 +89,27 @@ def get_all_characters() -> Dict[str, Dict[str, Any]]:
 
 
 def get_character(char_key: str) -> Optional[Dict[str, Any]]:
-    if char_key in _char_cache:
-        return _char_cache[char_key]
-
     path = _CHAR_DIR / f"{char_key}.yaml"
-    if not path.exists():
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
         logger.warning(f"Character file not found: {path}")
         return None
 
+    cached = _char_cache.get(char_key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
     data = _load_yaml(path)
     if data:
-        _char_cache[char_key] = data
+        global _generation
+        _generation += 1
+        _char_cache[char_key] = (mtime, data)
+        # rendered configs built from the old file are stale now
+        for k in [k for k in _char_render_cache if k[0] == char_key]:
+            del _char_render_cache[k]
+        for k in [k for k in _user_render_cache if k[1] == char_key]:
+            del _user_render_cache[k]
 
     return data
 
@@ -91,12 +118,20 @@ def load_char_config(char_key: Optional[str], user_data: Optional[Dict[str, Any]
     if not char_key:
         return None
 
+    # raw load first: it stats the file and evicts stale render-cache
+    # entries on change, so the lookup below can never serve a render
+    # built from an edited file
     char = get_character(char_key)  # Name "get_character" is not defined
 
     if not char:
         logger.warning(f"Character '{char_key}' not found.")
         return None
 
+    cache_key = (char_key, (user_data or {}).get("key"))
+    cached = _char_render_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     context = {
         "char": char,
         "user": user_data or {},
@@ -106,6 +141,8 @@ def load_char_config(char_key: Optional[str], user_data: Optional[Dict[str, Any]
 
     rendered = _render_templates(char, context)
 
+    if rendered:
+        _char_render_cache[cache_key] = rendered
     return rendered  # Returning Any from function declared to return "dict[Any, Any] | None"
 
 
@@ -134,14 +171,17 @@ def get_all_users() -> Dict[str, Dict[str, Any]]:
 
 
 def get_user(user_key: str) -> Optional[Dict[str, Any]]:
-    if user_key in _user_cache:
-        return _user_cache[user_key]
-
     path = _USER_DIR / f"{user_key}.yaml"
-    if not path.exists():
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
         logger.warning(f"User file not found: {path}")
         return None
 
+    cached = _user_cache.get(user_key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
     data = _load_yaml(path)
     if data:
         # Enrich with timezone info
@@ -155,7 +195,14 @@ def get_user(user_key: str) -> Optional[Dict[str, Any]]:
         else:
             data["_timezone"] = pytz.UTC
 
-        _user_cache[user_key] = data
+        global _generation
+        _generation += 1
+        _user_cache[user_key] = (mtime, data)
+        # rendered configs built from the old file are stale now
+        for k in [k for k in _user_render_cache if k[0] == user_key]:
+            del _user_render_cache[k]
+        for k in [k for k in _char_render_cache if k[1] == user_key]:
+            del _char_render_cache[k]
 
     return data
 
@@ -167,11 +214,18 @@ def load_user_config(
     if not user_key:
         return None
 
+    # raw load first so the mtime check (and its render-cache eviction)
+    # runs before the render cache is consulted
     user = get_user(user_key)
     if not user:
         logger.warning(f"User '{user_key}' not found.")
         return None
 
+    cache_key = (user_key, (char_data or {}).get("key"))
+    cached = _user_render_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     context = {
         "char": char_data or {},
         "user": user,
@@ -181,4 +235,26 @@ def load_user_config(
 
     rendered = _render_templates(user, context)
 
+    if rendered:
+        _user_render_cache[cache_key] = rendered
     return rendered
+
+
+# ─── PAIRS ───────────────────────────────────────────────────────────────────
+
+
+def load_persona_pair(
+    user_key: Optional[str],
+    char_key: Optional[str],
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Resolve the mutual user/char template dependency in one place:
+    render the user alone, render the char against it, then re-render
+    the user against the rendered char. The YAMLs are read once (raw
+    caches) and every step is a render-cache hit after the first call
+    for a given pair.
+    """
+    user_data = load_user_config(user_key, None) or {}
+    char_data = load_char_config(char_key, user_data) or {}
+    user_data = load_user_config(user_key, char_data) or {}
+    return user_data, char_data
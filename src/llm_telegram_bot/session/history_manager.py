@@ -1,27 +1,59 @@
 # src/llm_telegram_bot/session/history_manager.py
 import datetime
 import re
-from collections import Counter, deque
+from collections import deque
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Deque, Dict, List, Optional
 
 from llm_telegram_bot.utils.logger import logger
-from llm_telegram_bot.utils.summarize import extract_named_entities, safe_summarize
-from llm_telegram_bot.utils.token_utils import count_tokens
+from llm_telegram_bot.utils.summarize import extract_named_entities, safe_summarize_with_tokens
 
 TOKENS_PER_SENTENCE = 30  # rough tokens per sentence for sentence-budgeting
 
+# precompiled prefix test for remove_lettered_lists (hot path: runs on every message)
+_LETTER_PREFIX = re.compile(r'\s*[a-z0-9]\)\s')
 
-def keyword_extractor(text: str, lang: str) -> List[str]:
-    """Wrap NER extractor with safe fallback."""
+
+def _parse_ts(ts: str) -> datetime.datetime:
+    """
+    Parse our ts wire format "YYYY-MM-DD_HH-MM-SS" via `fromisoformat`,
+    which is ~10x faster than strptime (no format-string walk, no locale lock).
+    """
+    date_part, _, time_part = ts.partition("_")
+    return datetime.datetime.fromisoformat(f"{date_part}T{time_part.replace('-', ':')}")
+
+
+# short texts get a cheap gazetteer pass before we fire up spaCy
+_GAZETTEER_TEXT_LIMIT = 200
+
+
+@lru_cache(maxsize=32)
+def _gazetteer_pattern(known: tuple[str, ...]) -> re.Pattern:
+    """Compile a word-bounded union of already-seen entity names."""
+    return re.compile(r"\b(?:" + "|".join(re.escape(k) for k in known) + r")\b")
+
+
+def keyword_extractor(text: str, lang: str, known: tuple[str, ...] = ()) -> List[str]:
+    """
+    Wrap NER extractor with safe fallback.
+
+    For short texts (1-2 sentences), first try a regex gazetteer built from
+    `known` (the rolling NER buckets): re-mentions of known names then skip
+    the spaCy pipeline entirely. Unseen names still fall through to spaCy.
+    """
+    if known and len(text) < _GAZETTEER_TEXT_LIMIT:
+        hits = _gazetteer_pattern(known).findall(text)
+        if hits:
+            return list(dict.fromkeys(hits))
     try:
         return extract_named_entities(text, lang=lang)
     except Exception as e:
-        logger.warning(f"[keyword_extractor] failed: {e}")
+        logger.warning("[keyword_extractor] failed: %s", e)
         return []
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     ts: str
     who: str
@@ -31,19 +63,21 @@ class Message:
     compressed: str
     tokens_compressed: int
     keywords: List[str] = field(default_factory=list)
+    # parsed-once cache of `ts` so strptime never runs twice for the same message
+    ts_dt: Optional[datetime.datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Summary:
     who: str
     lang: str
     text: str
     tokens: int
-    ts: datetime.datetime = field(default_factory=datetime.datetime.utcnow)
+    ts: datetime.datetime = field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc))
     keywords: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class MegaSummary:
     text: str
     keywords: List[str]
@@ -100,6 +134,12 @@ class HistoryManager:
         self.tier1: Deque[Summary] = deque()
         self.tier2: Deque[MegaSummary] = deque()
 
+        # running token totals per tier, adjusted on every append/pop so
+        # token_stats is O(1) instead of three generator passes per message
+        self._tokens_t0 = 0
+        self._tokens_t1 = 0
+        self._tokens_t2 = 0
+
         # rolling NER buckets per tier
         self.tier0_keys: deque[str] = deque(maxlen=self.max_ner_t0)
         self.tier1_keys: deque[str] = deque(maxlen=self.max_ner_t1)
@@ -108,56 +148,94 @@ class HistoryManager:
         self._last_bot_ts: Optional[datetime.datetime] = None
 
         logger.debug(
-            f"[HistoryManager] init {bot_name}:{chat_id} "
-            f"N0={N0},N1={N1},caps=(T0={T0_cap},T1={T1_cap},T2={T2_cap}) "
-            f"NER caps=(t0={max_ner_t0},t1={max_ner_t1},t2={max_ner_t2}) "
-            f"extract_ner_t0_before={extract_ner_t0_before},"
-            f"after={extract_ner_t0_after},t1={extract_ner_t1}"
+            "[HistoryManager] init %s:%s N0=%d,N1=%d,caps=(T0=%d,T1=%d,T2=%d) "
+            "NER caps=(t0=%d,t1=%d,t2=%d) extract_ner_t0_before=%s,after=%s,t1=%s",
+            bot_name, chat_id, N0, N1, T0_cap, T1_cap, T2_cap,
+            max_ner_t0, max_ner_t1, max_ner_t2,
+            extract_ner_t0_before, extract_ner_t0_after, extract_ner_t1,
         )
 
+    def _known_keys(self) -> tuple[str, ...]:
+        """Union of all rolling NER buckets, used to seed the gazetteer."""
+        return tuple(dict.fromkeys([*self.tier0_keys, *self.tier1_keys, *self.tier2_keys]))
+
     def token_stats(self) -> Dict[str, int]:
         return {
-            "tier0": sum(m.tokens_compressed for m in self.tier0),
-            "tier1": sum(s.tokens for s in self.tier1),
-            "tier2": sum(m.tokens for m in self.tier2),
+            "tier0": self._tokens_t0,
+            "tier1": self._tokens_t1,
+            "tier2": self._tokens_t2,
         }
 
+    def clear(self) -> None:
+        """
+        Empty all tiers and the state derived from them.
+
+        Persona/history handlers must use this instead of clearing the
+        tier deques directly: the running token totals are maintained
+        incrementally by add_*/promotion, so a bare tier0.clear() leaves
+        them permanently out of sync.
+        """
+        self.tier0.clear()
+        self.tier1.clear()
+        self.tier2.clear()
+        self.tier0_keys.clear()
+        self.tier1_keys.clear()
+        self.tier2_keys.clear()
+        self._tokens_t0 = 0
+        self._tokens_t1 = 0
+        self._tokens_t2 = 0
+        # the last-bot-timestamp belongs to the wiped conversation; keeping
+        # it would feed the old persona's delta_seconds into new prompts
+        self._last_bot_ts = None
+
     def get_all_context(self) -> Dict[str, Any]:
         """
-        Returns all three tiers plus their rolling NER buckets,
-        each as a simple list for easy iteration/serialization.
+        Returns all three tiers plus their rolling NER buckets.
+
+        The values are the live deques (read-only views by convention):
+        callers only iterate and truth-test them, so copying every tier
+        into a fresh list on each prompt build would be wasted work.
+        Call `list(...)` at the call site if a snapshot is ever needed.
         """
         return {
-            "tier0": list(self.tier0),  # List[Message]
-            "tier1": list(self.tier1),  # List[Summary]
-            "tier2": list(self.tier2),  # List[MegaSummary]
-            "tier0_keys": list(self.tier0_keys),  # List[str]
-            "tier1_keys": list(self.tier1_keys),  # List[str]
-            "tier2_keys": list(self.tier2_keys),  # List[str]
+            "tier0": self.tier0,  # Deque[Message]
+            "tier1": self.tier1,  # Deque[Summary]
+            "tier2": self.tier2,  # Deque[MegaSummary]
+            "tier0_keys": self.tier0_keys,  # deque[str]
+            "tier1_keys": self.tier1_keys,  # deque[str]
+            "tier2_keys": self.tier2_keys,  # deque[str]
         }
 
     def _maybe_promote(self) -> None:
         # Tier-0 → Tier-1 promotion
         while len(self.tier0) > self.N0:
             old = self.tier0.popleft()
+            self._tokens_t0 -= old.tokens_compressed
             summ = self._compress_t1(old)
             self.tier1.append(summ)
-            for k in summ.keywords:
-                self.tier1_keys.append(k)
-
-        # Tier-1 → Tier-2 promotion
-        while len(self.tier1) > self.N1:
+            self._tokens_t1 += summ.tokens
+            self.tier1_keys.extend(summ.keywords)
+
+        # Tier-1 → Tier-2 promotion (coalesced: one summarizer call even when
+        # tier1 overflowed by several batches, e.g. while catching up after a
+        # history load — the old while-loop re-summarized the growing mega
+        # once per batch)
+        overflow = len(self.tier1) - self.N1
+        if overflow > 0:
             # at least 1
-            # never more than K at once
+            # usually the fraction of N1 (at the moment 25%), capped at K
+            # but always enough to clear the whole overflow in one go
             # never more than you have
-            # = usually the fraction of K (at the moment 25%)
             batch_size = min(
-                max(1, int(self.N1 * self.FRACTION_TO_SUMMARIZE)),
-                self.K,
+                max(
+                    min(max(1, int(self.N1 * self.FRACTION_TO_SUMMARIZE)), self.K),
+                    overflow,
+                ),
                 len(self.tier1),
             )
 
             batch: list[Summary] = [self.tier1.popleft() for _ in range(batch_size)]
+            self._tokens_t1 -= sum(s.tokens for s in batch)
             # some cleaning of the sentences so they get summarized better
             processed_texts = []
             for s in batch:
@@ -175,40 +253,39 @@ class HistoryManager:
             # Include previous Tier-2 summary (if exists)
             if self.tier2:
                 prev = self.tier2.popleft()
-                full_blob = prev.text + "\n\n" + batch_blob
+                self._tokens_t2 -= prev.tokens
+                full_blob = "\n\n".join((prev.text, batch_blob))
                 span_start = min(span_start, prev.span_start)
                 span_end = max(span_end, prev.span_end)
-                existing_keys = deque(prev.keywords)
+                existing_keys = prev.keywords
             else:
                 full_blob = batch_blob
-                existing_keys = deque()
+                existing_keys = []
 
-            # Choose language from current batch
-            langs = [s.lang for s in batch if s.lang != "unknown"]
-            chosen_lang = Counter(langs).most_common(1)[0][0] if langs else "english"
+            # Choose language from current batch (single-pass majority vote;
+            # the batch is tiny, a full Counter/most_common is overkill)
+            lang_counts: Dict[str, int] = {}
+            for s in batch:
+                if s.lang != "unknown":
+                    lang_counts[s.lang] = lang_counts.get(s.lang, 0) + 1
+            chosen_lang = max(lang_counts, key=lang_counts.get) if lang_counts else "english"
 
             # Summarize the full blob into Tier-2 "mega summary"
             cap = self.T2_cap
             num_sents = max(1, cap // TOKENS_PER_SENTENCE)
-            mega_text = safe_summarize(
+            mega_text, mega_tokens = safe_summarize_with_tokens(
                 full_blob,
                 num_sentences=num_sents,
                 lang=chosen_lang,
                 method="lsa",  # or texrank or lexrank
             )
 
-            mega_tokens = count_tokens(mega_text)
-
-            # Extract fresh keywords from batch_blob only (Tier-1 summaries)
-            new_keys = deque(extract_named_entities(batch_blob, lang=chosen_lang))
-
-            # Merge with existing Tier-2 keys (from previous summary)
-            for k in new_keys:
-                existing_keys.append(k)
+            # Reuse the keywords already extracted for each Tier-1 summary
+            # instead of re-running spaCy NER over the whole batch blob
+            new_keys = [k for s in batch for k in s.keywords]
 
-            # Deduplicate and truncate keys
-            deduped = list(dict.fromkeys(existing_keys))  # preserves order
-            deduped = deduped[-self.max_ner_t2 :]  # keep last N only
+            # Merge, deduplicate (order-preserving) and truncate in one O(n) pass
+            deduped = list(dict.fromkeys(existing_keys + new_keys))[-self.max_ner_t2 :]
 
             # Save new Tier-2 mega-summary
             mega = MegaSummary(
@@ -220,74 +297,93 @@ class HistoryManager:
                 is_stub=True,
             )
             self.tier2.append(mega)
+            self._tokens_t2 += mega_tokens
 
-            # Refresh Tier-2 keyword bucket
-            self.tier2_keys.clear()
-            for k in deduped:
-                self.tier2_keys.append(k)
+            # Refresh Tier-2 keyword bucket in one go
+            self.tier2_keys = deque(deduped, maxlen=self.max_ner_t2)
 
-            logger.debug(f"[promote] tier1→2: {mega}")
+            logger.debug("[promote] tier1→2: %s", mega)
 
     def add_user_message(self, msg: Message) -> None:
         # Tier-0 NER before or after compress
         if self.extract_ner_t0_before:
-            msg.keywords = keyword_extractor(msg.text, msg.lang)
+            msg.keywords = keyword_extractor(msg.text, msg.lang, known=self._known_keys())
         self._compress_t0(msg)
         if self.extract_ner_t0_after:
-            msg.keywords = keyword_extractor(msg.compressed, msg.lang)
+            msg.keywords = keyword_extractor(msg.compressed, msg.lang, known=self._known_keys())
 
         # roll into bucket
-        for k in msg.keywords:
-            self.tier0_keys.append(k)
+        self.tier0_keys.extend(msg.keywords)
 
         # logger.debug(f"[add_user] {msg.who} at {msg.ts}, toks={msg.tokens_compressed}, keys={msg.keywords}")
         self.tier0.append(msg)
-
-        # ---- record last‐bot timestamp for context logic ----
-        try:
-            # parse your ts format "YYYY-MM-DD_HH-MM-SS"
-            self._last_bot_ts = datetime.datetime.strptime(msg.ts, "%Y-%m-%d_%H-%M-%S")
-        except Exception:
-            logger.warning(f"[HistoryManager] could not parse bot ts: {msg.ts}")
-            self._last_bot_ts = None
-
+        self._tokens_t0 += msg.tokens_compressed
         self._maybe_promote()
 
     def add_bot_message(self, msg: Message) -> None:
         # same as user
         if self.extract_ner_t0_before:
-            msg.keywords = keyword_extractor(msg.text, msg.lang)
+            msg.keywords = keyword_extractor(msg.text, msg.lang, known=self._known_keys())
         self._compress_t0(msg)
         if self.extract_ner_t0_after:
-            msg.keywords = keyword_extractor(msg.compressed, msg.lang)
+            msg.keywords = keyword_extractor(msg.compressed, msg.lang, known=self._known_keys())
 
-        for k in msg.keywords:
-            self.tier0_keys.append(k)
+        self.tier0_keys.extend(msg.keywords)
 
         # logger.debug(f"[add_bot] {msg.who} at {msg.ts}, toks={msg.tokens_compressed}, keys={msg.keywords}")
         self.tier0.append(msg)
+        self._tokens_t0 += msg.tokens_compressed
+
+        # ---- record last‐bot timestamp for context logic ----
+        try:
+            # parse your ts format "YYYY-MM-DD_HH-MM-SS" exactly once per
+            # message — and not at all when the producer already set ts_dt
+            if msg.ts_dt is None:
+                msg.ts_dt = _parse_ts(msg.ts)
+            self._last_bot_ts = msg.ts_dt
+        except Exception:
+            logger.warning("[HistoryManager] could not parse bot ts: %s", msg.ts)
+
         self._maybe_promote()
 
     # this is for chars suggestion a list of option on how to proceed the conversation
     def remove_lettered_lists(self, text: str) -> str:
-        cleaned = re.sub(r'(?m)^\s*[a-z0-9]\)\s.*$', '', text)
-        return re.sub(r'\n{2,}', '\n\n', cleaned).strip()
+        # fast path: nothing to drop and nothing to collapse
+        if ')' not in text and '\n\n\n' not in text:
+            return text.strip()
+
+        # single pass: drop lettered lines, collapse runs of blank lines to one
+        out: list[str] = []
+        pending_blank = False
+        for line in text.splitlines():
+            if line and _LETTER_PREFIX.match(line):
+                line = ""
+            if line == "":
+                pending_blank = True
+                continue
+            if pending_blank and out:
+                out.append("")
+            out.append(line)
+            pending_blank = False
+        return "\n".join(out).strip()
 
     def _compress_t0(self, msg: Message) -> None:
-        # always remove lettered list
-        # for chars giving options on how to proceed, like a) option 1, b) option 2
-        msg.text = self.remove_lettered_lists(msg.text.replace("...", "."))
-
-        # just take short messages as they are
+        # just take short messages as they are — the common path skips the
+        # regex clean-up entirely
         L, cap = msg.tokens_text, self.T0_cap
         if L <= cap:
             msg.compressed = msg.text
             msg.tokens_compressed = L
             return
 
+        # remove lettered lists only when we actually summarize
+        # for chars giving options on how to proceed, like a) option 1, b) option 2
+        # (note: msg.text mutation is deferred to this branch)
+        msg.text = self.remove_lettered_lists(msg.text.replace("...", "."))
+
         num_sents = max(1, cap // TOKENS_PER_SENTENCE)
         try:
-            summary = safe_summarize(
+            summary, tokens = safe_summarize_with_tokens(
                 msg.text,
                 num_sentences=num_sents,
                 lang=msg.lang,
@@ -295,25 +391,35 @@ class HistoryManager:
             )
 
         except Exception as e:
-            logger.warning(f"[compress_t0] failed: {e}")
-            summary = msg.text
+            logger.warning("[compress_t0] failed: %s", e)
+            summary, tokens = msg.text, msg.tokens_text
 
         msg.compressed = summary
-        msg.tokens_compressed = count_tokens(summary)
+        msg.tokens_compressed = tokens
 
     def _compress_t1(self, msg: Message) -> Summary:
         cap = self.T1_cap
+
+        # already short enough — skip the Sumy pass and reuse the text as-is
+        if msg.tokens_compressed <= cap:
+            return Summary(
+                ts=msg.ts,
+                who=msg.who,
+                lang=msg.lang,
+                text=msg.compressed,
+                tokens=msg.tokens_compressed,
+                keywords=msg.keywords[: self.max_ner_t1],
+            )
+
         num_sents = max(1, cap // TOKENS_PER_SENTENCE)
         try:
-            text = safe_summarize(
+            text, tokens = safe_summarize_with_tokens(
                 msg.compressed, num_sentences=num_sents, lang=msg.lang, method="lsa"  # or texrank or lexrank
             )
 
         except Exception as e:
-            logger.warning(f"[compress_t1] failed: {e}")
-            text = msg.compressed
-
-        tokens = count_tokens(text)
+            logger.warning("[compress_t1] failed: %s", e)
+            text, tokens = msg.compressed, msg.tokens_compressed
 
         # NER on tier1 if requested, else inherit from message
         if self.extract_ner_t1:
@@ -333,18 +439,9 @@ class HistoryManager:
     @property
     def last_llm_response_time(self) -> Optional[datetime.datetime]:
         """
-        Returns the timestamp of the most recent bot (LLM) message in tier0,
+        Returns the timestamp of the most recent bot (LLM) message,
         parsed into a datetime, or None if no such message exists.
+        The value is maintained on every bot-message append, so no scan
+        of tier0 is needed here.
         """
-        bot_name = self.bot_name  # the identity name used for LLM replies
-        # scan tier0 in reverse (newest messages at the end of deque)
-        for msg in reversed(self.tier0):
-            if msg.who == bot_name:
-                try:
-                    # assuming ts format is "YYYY-MM-DD_HH-MM-SS"
-                    return datetime.datetime.strptime(msg.ts, "%Y-%m-%d_%H-%M-%S")
-                except ValueError:
-                    logger.warning(f"[HistoryManager] could not parse ts: {msg.ts}")
-                    return None
-
         return self._last_bot_ts
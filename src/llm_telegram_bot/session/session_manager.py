@@ -1,23 +1,107 @@
 # src/llm_telegram_bot/session/session_manager.py
 
 import asyncio
-import json
-import re
+import os
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
-from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import orjson
 import pytz
 
-from llm_telegram_bot.config.config_loader import load_config
-from llm_telegram_bot.config.persona_loader import load_char_config, load_user_config
+from llm_telegram_bot.config.config_loader import CONFIG_YAML, load_config
+from llm_telegram_bot.config.persona_loader import load_char_config, load_persona_pair, load_user_config
 from llm_telegram_bot.config.schemas import BotDefaults, RootConfig, ServiceConfig
 from llm_telegram_bot.session.history_manager import HistoryManager, Message
 from llm_telegram_bot.utils.logger import logger
 
 MAX_HISTORY_BYTES = 1_000_000
 
+
+def _latest_history_version(history_dir: Path, base: str) -> Optional[tuple]:
+    """Find the newest `{base}.json` / `{base}_vN.json` as `(version, path)`,
+    or None if there is none yet.
+
+    One os.scandir pass with a plain-string suffix parse and a running
+    max: cheaper than Path.glob plus a regex match per entry, and no
+    list to build and sort just to take its last element.
+    """
+    best_ver = -1
+    best_path: Optional[Path] = None
+    with os.scandir(history_dir) as it:
+        for de in it:
+            name = de.name
+            if not name.startswith(base) or not name.endswith(".json"):
+                continue
+            mid = name[len(base) : -5]
+            if not mid:
+                ver = 1
+            elif mid.startswith("_v") and mid[2:].isdigit():
+                ver = int(mid[2:])
+            else:
+                continue
+            if ver > best_ver:
+                best_ver, best_path = ver, Path(de.path)
+    if best_path is None:
+        return None
+    return best_ver, best_path
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write-to-temp + os.replace: atomic on POSIX, so a crash mid-write
+    can never leave a half-written file for the next load to choke on."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _migrate_legacy_history(path: Path) -> int:
+    """Rewrite a pre-NDJSON history file (one JSON object holding the whole
+    `history_buffer`) as one entry per line. No-op for files already in
+    NDJSON form. Returns the file size afterwards so callers can seed the
+    flush cursor without another stat.
+    """
+    try:
+        raw = path.read_bytes()
+    except OSError:
+        return 0
+    if not raw.lstrip()[:1] == b"{":
+        return len(raw)
+    try:
+        first = orjson.loads(raw.split(b"\n", 1)[0])
+    except Exception:
+        first = None  # pretty-printed legacy payload spans lines
+    if isinstance(first, dict) and "history_buffer" not in first:
+        return len(raw)  # already NDJSON
+    try:
+        payload = orjson.loads(raw)
+    except Exception:
+        return len(raw)
+    if not isinstance(payload, dict):
+        return len(raw)
+    data = b"".join(orjson.dumps(e) + b"\n" for e in payload.get("history_buffer", []))
+    _atomic_write(path, data)
+    return len(data)
+
+
+def _read_tail_lines(path: Path, max_lines: int) -> List[bytes]:
+    """Return the last `max_lines` lines of an NDJSON file by reading
+    blocks backwards from the end, so load cost is O(tail) not O(file).
+    """
+    with path.open("rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        pos = fh.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= max_lines:
+            step = min(64 * 1024, pos)
+            pos -= step
+            fh.seek(pos)
+            data = fh.read(step) + data
+    return data.splitlines()[-max_lines:]
+
+
 # yeah just, quickly testing
 N0_MAX_MESSAGES = 13  # if odd, last msg in tier is from LLM
 N1_MAX_MESSAGES = 45
@@ -53,6 +137,9 @@ class Session:
         self.active_model: Optional[str] = None
         self.model_config: ModelConfig = ModelConfig()
         self.think_block_on: Optional[bool] = True
+        # memoized get_effective_llm_params result; the set_* helpers
+        # below clear it when any input changes
+        self._effective_params: Optional[tuple] = None
 
         # ── Persona & Scenario ────────────────────────────
         self.active_char: Optional[str] = None
@@ -63,7 +150,9 @@ class Session:
 
         # ── Legacy history buffer (for `/history`) ────────
         self.history_on: bool = False
-        self.history_buffer: list[dict] = []
+        # deque: O(1) appends from the poller and cheap clear-after-flush;
+        # unbounded on purpose — it only holds not-yet-flushed entries
+        self.history_buffer: deque[dict] = deque()
         # we’ll set last_load_ts only after we actually load from disk
         self.last_load_ts: Optional[str] = "2000-01-01T00:00:00.000000"
 
@@ -73,6 +162,19 @@ class Session:
         # ── Ephemeral memory ──────────────────────────────
         self.memory: Dict[str, List[Any]] = {}
 
+        # ── Last detected language (fallback for short texts) ──
+        self.last_lang: Optional[str] = None
+
+        # ── History-file cursor ───────────────────────────
+        # Only this process writes the history files, so once we have
+        # discovered the highest version we can keep flushing to it
+        # without re-scanning the directory every time.
+        self._hist_base: Optional[str] = None
+        self._hist_ver: Optional[int] = None
+        self._hist_path: Optional[Path] = None
+        self._hist_size: int = 0
+        self._hist_meta: Optional[tuple] = None
+
         # ── Tiered history manager (hard-coded for now) ───
         # TO DO: pull these values from config.yaml instead of hard-coding
         #   N0 = max raw msgs before promoting to tier1
@@ -98,10 +200,10 @@ class Session:
             max_ner_t2=MAX_NER_T2,
         )
 
-        # Start periodic flush every 10 minutes
-        # MUST be inside a running asyncio loop
-        loop = asyncio.get_event_loop()
-        self._flush_task = loop.create_task(self._periodic_flush())
+        # Periodic flushing is handled by the module-level flush loop
+        # (one task for all sessions instead of one timer each); no-op
+        # when no loop is running yet
+        _ensure_flush_loop()
 
     def pause(self) -> None:
         self.messaging_paused = True
@@ -109,72 +211,85 @@ class Session:
     def resume(self) -> None:
         self.messaging_paused = False
 
-    async def _periodic_flush(self):
-        while True:
-            await asyncio.sleep(600)  # 10 minutes
-            try:
-                if self.history_on and self.history_buffer:
-                    path = self.flush_history_to_disk()  # consumes history_buffer only
-                    logger.debug(f"[Session {self.chat_id}] Periodic flush wrote to {path}")
-            except Exception as e:
-                logger.exception(f"[Session {self.chat_id}] Periodic flush failed: {e}")
-
     def flush_history_to_disk(self) -> Path:
         """
-        Rotate+append: find the highest‐version file,
-        bump if it’s over MAX_HISTORY_BYTES, merge, write back,
-        then clear only self.history_buffer.
+        Append-only flush: drain the buffered entries and write them as
+        NDJSON lines to the highest‐version file, bumping the version once
+        it passes MAX_HISTORY_BYTES. Session metadata lives in a sibling
+        `.meta.json`, rewritten only when it changes, so steady-state cost
+        is O(new entries) not O(file).
+
+        Runs on a worker thread (flush loop) as well as on the loop thread
+        (close/flush_all_pending), so the buffer is drained via popleft —
+        atomic on deque — instead of iterated: concurrent appends land
+        safely behind the drain and two racing flushers never write the
+        same entry twice.
         """
         history_dir = Path("histories") / self.bot_name / str(self.chat_id)
         history_dir.mkdir(parents=True, exist_ok=True)
 
         base = f"{self.active_user}_with_{self.active_char}"
-        # regex to capture an optional “_vN”
-        pattern = re.compile(rf"^{re.escape(base)}(?:_v(\d+))?\.json$")
+        if self._hist_path is None or self._hist_base != base:
+            # first flush for this user/char pair: discover the cursor
+            latest = _latest_history_version(history_dir, base)
+            if latest:
+                ver, path = latest
+                size = _migrate_legacy_history(path)
+            else:
+                # first time ever
+                ver, path, size = 1, history_dir / f"{base}.json", 0
+            self._hist_base = base
+            self._hist_ver, self._hist_path, self._hist_size = ver, path, size
+
+        # if the latest file is too big, bump version (no stat needed:
+        # the cursor remembers what we last wrote)
+        if self._hist_size >= MAX_HISTORY_BYTES:
+            self._hist_ver += 1
+            self._hist_path = history_dir / f"{base}_v{self._hist_ver}.json"
+            self._hist_size = 0
+        path = self._hist_path
+
+        # snapshot the delta without iterating the live deque
+        entries: list[dict] = []
+        try:
+            while True:
+                entries.append(self.history_buffer.popleft())
+        except IndexError:
+            pass
 
-        candidates = []
-        for p in history_dir.glob(f"{base}*.json"):
-            m = pattern.match(p.name)
-            if not m:
-                continue
-            ver = int(m.group(1) or 1)
-            candidates.append((ver, p))
-        if candidates:
-            candidates.sort()
-            ver, path = candidates[-1]
-            # if the latest file is too big, bump version
-            if path.stat().st_size >= MAX_HISTORY_BYTES:
-                ver += 1
-                path = history_dir / f"{base}_v{ver}.json"
-        else:
-            # first time ever
-            ver, path = 1, history_dir / f"{base}.json"
-
-        # load existing payload if any
+        data = b"".join(orjson.dumps(entry) + b"\n" for entry in entries)
         try:
-            existing = json.loads(path.read_text(encoding="utf-8"))
+            with path.open("ab") as fh:
+                fh.write(data)
         except Exception:
-            existing = {}
-
-        old = existing.get("history_buffer", [])
-        merged = old + self.history_buffer
-
-        payload = {
-            "active_service": self.active_service,
-            "active_model": self.active_model,
-            "active_char": self.active_char,
-            "active_user": self.active_user,
-            "jailbreak": self.jailbreak,
-            "history_on": self.history_on,
-            "history_buffer": merged,
-        }
-
-        # write merged back out
-        path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
-        logger.debug(f"[Session {self.chat_id}] History flushed to {path}")
+            # put the snapshot back in front so the next flush retries it
+            self.history_buffer.extendleft(reversed(entries))
+            raise
+        self._hist_size += len(data)
+
+        # cheap tuple compare first; the meta dict is only built (and
+        # written) when something actually changed
+        meta_state = (
+            self.active_service,
+            self.active_model,
+            self.active_char,
+            self.active_user,
+            self.jailbreak,
+            self.history_on,
+        )
+        if meta_state != self._hist_meta:
+            meta = {
+                "active_service": self.active_service,
+                "active_model": self.active_model,
+                "active_char": self.active_char,
+                "active_user": self.active_user,
+                "jailbreak": self.jailbreak,
+                "history_on": self.history_on,
+            }
+            _atomic_write(history_dir / f"{base}.meta.json", orjson.dumps(meta))
+            self._hist_meta = meta_state
 
-        # clear only in-memory buffer
-        self.history_buffer.clear()
+        logger.debug(f"[Session {self.chat_id}] History flushed to {path}")
         return path
 
     def load_history_from_disk(self) -> str:
@@ -188,81 +303,190 @@ class Session:
             raise FileNotFoundError(f"No history directory at {history_dir}")
 
         base = f"{self.active_user}_with_{self.active_char}"
-        pattern = re.compile(rf"^{re.escape(base)}(?:_v(\d+))?\.json$")
-        versions = []
-        for p in history_dir.glob(f"{base}*.json"):
-            m = pattern.match(p.name)
-            if not m:
-                continue
-            ver = int(m.group(1) or 1)
-            versions.append((ver, p))
+        newest = _latest_history_version(history_dir, base)
 
-        if not versions:
+        if newest is None:
             raise FileNotFoundError(f"No versions of {base}*.json in {history_dir}")
 
-        # pick the highest version
-        _, latest = sorted(versions)[-1]
-
-        # load raw payload
-        data = json.loads(latest.read_text(encoding="utf-8"))
-        full_buffer = data.get("history_buffer", [])
-        # self.history_buffer = full_buffer  # keep full for manual flush
+        # seed the flush cursor so later flushes skip the scan
+        ver, latest = newest
+        self._hist_base = base
+        self._hist_ver, self._hist_path = ver, latest
+        self._hist_size = _migrate_legacy_history(latest)
 
-        logger.info(f"[Session {self.chat_id}] Loaded {len(full_buffer)} entries from {latest}")
-
-        # seed HistoryManager with only the last N0*2 entries
+        # seed HistoryManager with only the tail of the file: read the
+        # last lines backwards so we never touch the rest of it
         N0 = self.history_mgr.N0
         N1 = self.history_mgr.N1
         K = self.history_mgr.K
         # TO DO: this should be adjusted as soon as tier-1, and tier-2 are implemented
-        recent_raw = full_buffer[-(N0 + N1 + K + 5) :]  # 5 is for keywords only
+        tail = _read_tail_lines(latest, N0 + N1 + K + 5)  # 5 is for keywords only
+        recent_raw = []
+        for line in tail:
+            if not line:
+                continue
+            try:
+                recent_raw.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # a crash mid-append can leave one torn line; skip it
+                # loudly instead of discarding the whole file
+                logger.warning(f"[Session {self.chat_id}] Skipping torn history line in {latest}")
+
+        logger.info(f"[Session {self.chat_id}] Loaded last {len(recent_raw)} entries from {latest}")
+
+        # hoisted out of the loop: identity lookup and bound methods
+        user_name = (self.active_user_data or {}).get("identity", {}).get("name")
+        add_user = self.history_mgr.add_user_message
+        add_bot = self.history_mgr.add_bot_message
 
         for entry in recent_raw:
+            text = entry["text"]
+            # whitespace-count beats text.split(): no throwaway list
+            tokens_text = entry.get("tokens_text", text.count(" ") + 1)
             msg = Message(
                 ts=entry["ts"],
                 who=entry["who"],
                 lang=entry.get("lang", "unknown"),
-                text=entry["text"],
-                compressed=entry.get("compressed", entry["text"]),
-                tokens_text=entry.get("tokens_text", len(entry["text"].split())),
-                tokens_compressed=entry.get("tokens_compressed", entry.get("tokens_text", len(entry["text"].split()))),
+                text=text,
+                compressed=entry.get("compressed", text),
+                tokens_text=tokens_text,
+                tokens_compressed=entry.get("tokens_compressed", tokens_text),
             )
             # dispatch into user vs bot so your promotions work correctly
-            if entry["who"] == self.active_user_data["identity"]["name"]:
-                self.history_mgr.add_user_message(msg)
+            if entry["who"] == user_name:
+                add_user(msg)
             else:
-                self.history_mgr.add_bot_message(msg)
+                add_bot(msg)
 
         self.last_load_ts = datetime.now().isoformat(timespec="seconds")
         return str(latest)
 
     def close(self):
         """
-        Cancel background tasks (if you tear down sessions).
+        Tear down a session: write out anything still buffered. The flush
+        loop itself is shared (see _global_flush_loop), so there is no
+        per-session task to cancel.
         """
-        if hasattr(self, "_flush_task"):
-            self._flush_task.cancel()
+        if self.history_on and self.history_buffer:
+            self.flush_history_to_disk()
 
 
 # ────────────────────────────────────────────────────
-_sessions: Dict[str, Session] = {}
+# how many sessions to keep resident before evicting the least recently
+# used one (each carries a HistoryManager with three tiers of state)
+MAX_SESSIONS = 1024
+
+# keyed on (chat_id, bot_name): tuple hashing beats building a
+# f"{chat_id}:{bot_name}" string on every get_session call; ordered so
+# get_session can evict LRU-first once MAX_SESSIONS is reached
+_sessions: "OrderedDict[tuple, Session]" = OrderedDict()
+# guards create-on-miss; lookups stay lock-free
+_sessions_lock = threading.Lock()
+
+FLUSH_INTERVAL_S = 600  # 10 minutes
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+def _ensure_flush_loop() -> None:
+    """Start the shared flush loop once, on first session creation."""
+    global _flush_task
+    if _flush_task is not None and not _flush_task.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # no loop yet (sync tests / tooling): the first session created
+        # inside the running loop will start the worker
+        return
+    _flush_task = loop.create_task(_global_flush_loop())
+
+
+async def _global_flush_loop():
+    """
+    One flusher for every session: each tick, collect the sessions with a
+    dirty buffer and write them all in a single worker-thread hop, instead
+    of N bots x M chats independent timers each waking the loop and
+    touching the disk on their own.
+    """
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_S)
+        dirty = [s for s in _sessions.values() if s.history_on and s.history_buffer]
+        if not dirty:
+            continue
+
+        def _flush_all() -> None:
+            for sess in dirty:
+                try:
+                    path = sess.flush_history_to_disk()
+                    logger.debug(f"[Session {sess.chat_id}] Periodic flush wrote to {path}")
+                except Exception as e:
+                    logger.exception(f"[Session {sess.chat_id}] Periodic flush failed: {e}")
+
+        await asyncio.to_thread(_flush_all)
+
+
+def flush_all_pending() -> None:
+    """
+    Flush every session with buffered history. For graceful shutdown,
+    when waiting for the next periodic tick would lose the tail.
+    """
+    for sess in list(_sessions.values()):
+        if sess.history_on and sess.history_buffer:
+            try:
+                sess.flush_history_to_disk()
+            except Exception as e:
+                logger.exception(f"[Session {sess.chat_id}] Shutdown flush failed: {e}")
+
+
+_config_cache: Optional[RootConfig] = None
+_config_mtime_ns: Optional[int] = None
 
 
-@lru_cache(maxsize=1)
 def get_config() -> RootConfig:
     """
-    Return cached RootConfig. Only loads once.
+    Return the cached RootConfig, re-parsing only when config.yaml's
+    mtime changes — config edits are picked up without a restart, and
+    steady-state calls cost one stat instead of a YAML parse.
     """
-    return load_config()
+    global _config_cache, _config_mtime_ns
+    try:
+        mtime_ns = os.stat(CONFIG_YAML).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    if _config_cache is None or mtime_ns != _config_mtime_ns:
+        _config_cache = load_config()
+        _config_mtime_ns = mtime_ns
+    return _config_cache
+
+
+def _evict_lru() -> None:
+    """Pop least-recently-used sessions past MAX_SESSIONS, closing each
+    (close flushes anything the session still buffers)."""
+    while len(_sessions) > MAX_SESSIONS:
+        _, evicted = _sessions.popitem(last=False)
+        try:
+            evicted.close()
+        except Exception as e:
+            logger.exception(f"[Session {evicted.chat_id}] Eviction flush failed: {e}")
 
 
 def get_session(chat_id: int, bot_name: str) -> Session:
     """
     Retrieve an existing Session or create a new one based on both chat_id and bot_name.
     """
-    session_key = f"{chat_id}:{bot_name}"
+    session_key = (chat_id, bot_name)
+
+    # fast path: no lock and no string formatting on every handler hit
+    existing = _sessions.get(session_key)
+    if existing is not None:
+        _sessions.move_to_end(session_key)  # mark as recently used
+        return existing
+
+    with _sessions_lock:
+        if session_key in _sessions:  # lost the race to another creator
+            return _sessions[session_key]
 
-    if session_key not in _sessions:
         session = Session(chat_id, bot_name)
 
         cfg = get_config()
@@ -287,9 +511,7 @@ def get_session(chat_id: int, bot_name: str) -> Session:
             )
 
             # ── Load config data ───────────────────────────────────────────
-            user_data = load_user_config(session.active_user, None) or {}
-            char_data = load_char_config(session.active_char, user_data) or {}
-            user_data = load_user_config(session.active_user, char_data) or {}
+            user_data, char_data = load_persona_pair(session.active_user, session.active_char)
 
             session.active_char_data = char_data
             session.active_user_data = user_data
@@ -298,22 +520,8 @@ def get_session(chat_id: int, bot_name: str) -> Session:
             try:
                 path = session.load_history_from_disk()
                 logger.info(f"[Session {chat_id}] History loaded from {path}")
-
-                for entry in session.history_buffer:
-                    session.history_mgr.tier0.append(
-                        Message(
-                            ts=entry["ts"],
-                            who=entry["who"],
-                            lang=entry.get("lang", "unknown"),
-                            text=entry["text"],
-                            compressed=entry.get("compressed", entry["text"]),
-                            tokens_text=entry.get("tokens_text", 0),
-                            tokens_compressed=entry.get("tokens_compressed", entry.get("tokens_text", 0)),
-                        )
-                    )
-
-                session.history_buffer.clear()
-
+                # load_history_from_disk already seeded the tiers; the old
+                # re-seeding pass over history_buffer here only duplicated it
                 logger.info(f"[Session {chat_id}] Loaded {len(session.history_mgr.tier0)} tier0 history entries.")
             except FileNotFoundError:
                 pass
@@ -322,21 +530,18 @@ def get_session(chat_id: int, bot_name: str) -> Session:
             tz = char_data.get("_timezone") or user_data.get("_timezone") or pytz.UTC
             session.now = datetime.now(tz)
 
-            # ── Scan history for last bot message (char name) ──────────────
-            last_ts = None
-            char_name = char_data.get("identity", {}).get("name")
-            for entry in reversed(session.history_mgr.tier0):
-                if entry.who == char_name:
-                    try:
-                        last_ts = datetime.strptime(entry.ts, "%Y-%m-%d_%H-%M-%S").replace(tzinfo=tz)
-                    except Exception:
-                        logger.warning(f"[Session {chat_id}] Failed to parse timestamp: {entry.ts}")
-                    break
-
-            session.last_llm_ts = last_ts
+            # ── Last bot message timestamp ─────────────────────────────────
+            # tracked by HistoryManager as messages are inserted, so no
+            # reversed scan (and no re-parsing) at startup
+            last_ts = session.history_mgr.last_llm_response_time
+            session.last_llm_ts = last_ts.replace(tzinfo=tz) if last_ts else None
 
         _sessions[session_key] = session
 
+        # keep RSS bounded on public bots: evict the coldest session,
+        # persisting anything it still buffers
+        _evict_lru()
+
     return _sessions[session_key]
 
 
@@ -345,13 +550,13 @@ def is_paused(chat_id: int, bot_name: str) -> bool:
 
 
 def get_model(chat_id: int, bot_name: str) -> Optional[str]:
-    model = get_session(chat_id, bot_name).active_model
-    logger.debug(f"[get_model] Active model for chat {chat_id} (bot {bot_name}): {model}")
-    return model
+    return get_session(chat_id, bot_name).active_model
 
 
 def set_model(chat_id: int, bot_name: str, model: str) -> None:
-    get_session(chat_id, bot_name).active_model = model
+    sess = get_session(chat_id, bot_name)
+    sess.active_model = model
+    sess._effective_params = None
 
 
 def get_service(chat_id: int, bot_name: str) -> Optional[str]:
@@ -359,7 +564,9 @@ def get_service(chat_id: int, bot_name: str) -> Optional[str]:
 
 
 def set_service(chat_id: int, bot_name: str, service: str) -> None:
-    get_session(chat_id, bot_name).active_service = service
+    sess = get_session(chat_id, bot_name)
+    sess.active_service = service
+    sess._effective_params = None
 
 
 def get_temperature(chat_id: int, bot_name: str) -> float:
@@ -367,7 +574,9 @@ def get_temperature(chat_id: int, bot_name: str) -> float:
 
 
 def set_temperature(chat_id: int, bot_name: str, temperature: float) -> None:
-    get_session(chat_id, bot_name).model_config.temperature = temperature
+    sess = get_session(chat_id, bot_name)
+    sess.model_config.temperature = temperature
+    sess._effective_params = None
 
 
 def get_max_tokens(chat_id: int, bot_name: str) -> int:
@@ -375,7 +584,9 @@ def get_max_tokens(chat_id: int, bot_name: str) -> int:
 
 
 def set_max_tokens(chat_id: int, bot_name: str, max_tokens: int) -> None:
-    get_session(chat_id, bot_name).model_config.max_tokens = max_tokens
+    sess = get_session(chat_id, bot_name)
+    sess.model_config.max_tokens = max_tokens
+    sess._effective_params = None
 
 
 def get_think_blocks_on(chat_id: int, bot_name: str) -> bool:
@@ -383,7 +594,9 @@ def get_think_blocks_on(chat_id: int, bot_name: str) -> bool:
 
 
 def set_think_blocks_on(chat_id: int, bot_name: str, think_bool: bool) -> None:
-    get_session(chat_id, bot_name).model_config.think_block_on = think_bool
+    sess = get_session(chat_id, bot_name)
+    sess.model_config.think_block_on = think_bool
+    sess._effective_params = None
 
 
 def get_effective_llm_params(
@@ -402,48 +615,42 @@ def get_effective_llm_params(
         5. Fallback to bot default
     """
     sess = get_session(chat_id, bot_name)
+    if sess._effective_params is not None:
+        return sess._effective_params
+
+    mc = sess.model_config
+    # hoisted: every ladder below used to re-compare this
+    svc_is_default = sess.active_service == bot_default.service
 
     # --- Model ---
-    if sess.model_config.model_name:
-        model = sess.model_config.model_name
-    elif sess.active_model:
-        model = sess.active_model
-    elif sess.active_service == bot_default.service:
-        model = bot_default.model
-    else:
-        model = svc_conf.model or bot_default.model
+    model = mc.model_name or sess.active_model or (bot_default.model if svc_is_default else (svc_conf.model or bot_default.model))
 
     # --- Temperature ---
-    if sess.model_config.temperature is not None:
-        temperature = sess.model_config.temperature
-    elif sess.active_service == bot_default.service:
+    if mc.temperature is not None:
+        temperature = mc.temperature
+    elif svc_is_default or svc_conf.temperature is None:
         temperature = bot_default.temperature
-    elif svc_conf.temperature is not None:
-        temperature = svc_conf.temperature
     else:
-        temperature = bot_default.temperature
+        temperature = svc_conf.temperature
 
     # --- Max tokens ---
-    if sess.model_config.max_tokens is not None:
-        max_toks = sess.model_config.max_tokens
-    elif sess.active_service == bot_default.service:
+    if mc.max_tokens is not None:
+        max_toks = mc.max_tokens
+    elif svc_is_default or svc_conf.maxtoken is None:
         max_toks = bot_default.maxtoken
-    elif svc_conf.maxtoken is not None:
-        max_toks = svc_conf.maxtoken
     else:
-        max_toks = bot_default.maxtoken
+        max_toks = svc_conf.maxtoken
 
     # --- Think Block ---
-    if sess.model_config.think_block_on is not None:
-        think_bool = sess.model_config.think_block_on
-    elif sess.active_service == bot_default.service:
+    if mc.think_block_on is not None:
+        think_bool = mc.think_block_on
+    elif svc_is_default or svc_conf.temperature is None:
         think_bool = bot_default.think_block_on
-    elif svc_conf.temperature is not None:
-        think_bool = svc_conf.think_block_on
     else:
-        think_bool = bot_default.think_block_on
+        think_bool = svc_conf.think_block_on
 
-    return model, temperature, max_toks, think_bool
+    sess._effective_params = (model, temperature, max_toks, think_bool)
+    return sess._effective_params
 
 
 # ────────────────────────────────────────────────────
@@ -459,8 +666,9 @@ def resume(chat_id: int, bot_name: str) -> None:
 # Bot Management
 def get_available_bots() -> List[str]:
     """Return a list of all configured bot names."""
-    cfg = load_config()  # RootConfig
-    return list(cfg.telegram.bots.keys())
+    # no extra memoization: get_config is mtime-cached and listing the
+    # keys is trivial, while caching here would miss config reloads
+    return list(get_config().telegram.bots.keys())
 
 
 def set_active_bot(chat_id: int, bot_name: str) -> None:
@@ -537,4 +745,9 @@ def get_memory(chat_id: int, bot_name: str) -> Dict[str, List[Any]]:
 
 def add_memory(chat_id: int, bot_name: str, bucket: str, value: Any) -> None:
     session = get_session(chat_id, bot_name)
-    session.memory.setdefault(bucket, []).append(value)
+    # get-then-create beats setdefault here: no throwaway [] built on
+    # every call once the bucket exists
+    bucket_list = session.memory.get(bucket)
+    if bucket_list is None:
+        bucket_list = session.memory[bucket] = []
+    bucket_list.append(value)
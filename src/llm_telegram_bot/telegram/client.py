@@ -85,8 +85,14 @@ class TelegramClient:
         self.chat_history_path.mkdir(parents=True, exist_ok=True)
 
     async def init_session(self) -> None:
-        """Create the aiohttp session."""
-        self.session = aiohttp.ClientSession()
+        """Create the aiohttp session.
+
+        One pooled connector shared by polling, sends, and downloads; the
+        keep-alive window outlasts the idle polling interval so we don't
+        pay a fresh TCP+TLS handshake on every poll.
+        """
+        connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=75)
+        self.session = aiohttp.ClientSession(connector=connector)
 
     async def close_session(self) -> None:
         """Close the aiohttp session."""
@@ -144,8 +150,13 @@ class TelegramClient:
             logger.exception(f"[send_message] Exception after {time.time() - start:.2f}s")
             return {"ok": False, "error_code": 500, "description": str(e)}
 
-    async def get_updates(self, offset: Optional[int] = None) -> Dict[str, Any]:
-        """Long-poll Telegram for new updates."""
+    async def get_updates(self, offset: Optional[int] = None, timeout: int = 0) -> Dict[str, Any]:
+        """Long-poll Telegram for new updates.
+
+        With `timeout` > 0 the server holds the request open up to that many
+        seconds and answers immediately when a message arrives, so callers
+        don't need their own polling sleep.
+        """
         # Ensure session is initialized, then narrow type for MyPy
         if self.session is None:
             await self.init_session()
@@ -154,10 +165,17 @@ class TelegramClient:
         params: Dict[str, Any] = {}
         if offset is not None:
             params["offset"] = offset
+        if timeout:
+            params["timeout"] = timeout
+
+        # give the HTTP layer a little headroom beyond the server-side hold
+        request_kwargs: Dict[str, Any] = {"params": params}
+        if timeout:
+            request_kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout + 5)
 
         start = time.time()
         try:
-            async with session.get(f"{self.api_url}/getUpdates", params=params) as resp:
+            async with session.get(f"{self.api_url}/getUpdates", **request_kwargs) as resp:
                 data = await resp.json()
                 elapsed = time.time() - start
 
@@ -2,12 +2,12 @@
 
 import asyncio
 import os
-import time
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 import pytz
-from langdetect import LangDetectException, detect
+from lingua import Language, LanguageDetectorBuilder
 
 import llm_telegram_bot.commands.handlers  # noqa: F401
 from llm_telegram_bot.config.config_loader import load_config
@@ -18,14 +18,10 @@ from llm_telegram_bot.services.service_groq import GroqService
 from llm_telegram_bot.services.service_mistral import MistralService
 from llm_telegram_bot.session.history_manager import Message
 from llm_telegram_bot.session.session_manager import (
+    flush_all_pending,
     get_effective_llm_params,
     get_session,
     is_paused,
-    set_max_tokens,
-    set_model,
-    set_service,
-    set_temperature,
-    set_think_blocks_on,
 )
 from llm_telegram_bot.telegram.client import TelegramClient
 from llm_telegram_bot.utils.logger import logger
@@ -36,6 +32,61 @@ from llm_telegram_bot.utils.message_utils import (
 )
 from llm_telegram_bot.utils.token_utils import count_tokens
 
+# cap concurrent summarization work so CPU-bound TextRank/NER passes
+# dispatched off the event loop don't saturate all cores
+_SUMMARIZE_SEM = asyncio.Semaphore(4)
+
+# below this length detection is guesswork anyway; reuse the session's
+# last known language instead
+_LANG_DETECT_MIN_CHARS = 20
+
+# server-side getUpdates hold time: Telegram answers as soon as a message
+# arrives, so there is no client-side polling sleep to tune anymore
+_LONG_POLL_TIMEOUT_S = 30
+
+# cap on a coalesced user_text; beyond this a burst is split into
+# separate LLM calls rather than building an oversized prompt
+_BATCH_TEXT_CAP = 4000
+
+# lingua singleton restricted to the languages the bot actually uses;
+# models load once per process instead of langdetect's per-call scoring
+# of ~55 n-gram profiles
+_LINGUA = LanguageDetectorBuilder.from_languages(Language.ENGLISH, Language.GERMAN).build()
+
+
+# one strftime per wall-clock second, shared by all bots; the wire format
+# only has second precision so re-formatting within a second is wasted work
+_ts_format_cache: tuple[int, str] = (0, "")
+
+
+def _format_ts(dt: datetime) -> str:
+    global _ts_format_cache
+    sec = int(dt.timestamp())
+    if sec != _ts_format_cache[0]:
+        _ts_format_cache = (sec, dt.strftime("%Y-%m-%d_%H-%M-%S"))
+    return _ts_format_cache[1]
+
+
+def _msg_to_dict(msg: Message) -> Dict[str, Any]:
+    """Flatten a Message into the on-disk history_buffer entry format."""
+    return {
+        "who": msg.who,
+        "ts": msg.ts,
+        "lang": msg.lang,
+        "text": msg.text,
+        "tokens_text": msg.tokens_text,
+        "tokens_compressed": msg.tokens_compressed,
+    }
+
+
+@lru_cache(maxsize=1024)
+def _detect_lang_cached(prefix: str) -> str:
+    """Memoized lingua detection over a bounded prefix (see _handle_text)."""
+    lang = _LINGUA.detect_language_of(prefix)
+    if lang is None:
+        return "unknown"
+    return lang.iso_code_639_1.name.lower()
+
 
 class ChatSession:
     """
@@ -49,12 +100,22 @@ class ChatSession:
         self.client = client
         self.chat_id = chat_id
         self.bot_name = bot_name
-        self._session = get_session(chat_id, bot_name)
-        # History Manager for Summarization of tiers 0-2
-        self.history_mgr = self._session.history_mgr
         # History Buffer for writing to file
         self.history_buffer: list[dict] = []
 
+    @property
+    def _session(self):
+        # re-resolved on every access (the registry's lock-free fast
+        # path): holding the Session here would pin it past LRU eviction,
+        # hide its buffer from the flush loop, and split state from the
+        # /command handlers, which always go through get_session
+        return get_session(self.chat_id, self.bot_name)
+
+    @property
+    def history_mgr(self):
+        # History Manager for Summarization of tiers 0-2
+        return self._session.history_mgr
+
     async def send_message(self, text: str, *, parse_mode: str = "MarkdownV2", **kwargs) -> None:
         self.client.chat_id = self.chat_id
         await self.client.send_message(text, parse_mode=parse_mode, **kwargs)
@@ -103,17 +164,22 @@ class PollingLoop:
         self.bot_config = bot_cfg
         self.chat_id = bot_cfg.chat_id
 
-        # polling intervals: bot override → global
-        self.polling_active_period = getattr(
-            bot_cfg,
-            "polling_active_period",
-            tg_cfg.polling_active_period,
-        )
-        self.polling_interval_active = getattr(
-            bot_cfg,
-            "polling_interval_active",
-            tg_cfg.polling_interval_active,
-        )
+        # invariant per poller; looked up once instead of per message
+        self._bot_def = config.factorydefault
+
+        # pooled ChatSession wrappers, one per chat_id (see handle_update)
+        self._chat_sessions: dict[int, ChatSession] = {}
+
+        # resolve the router once here instead of re-importing inside
+        # _handle_text for every /command (late import avoids circularity;
+        # by construction time the module cycle is already resolved)
+        from llm_telegram_bot.telegram.routing import route_message
+
+        self._route_message = route_message
+
+        # error backoff: bot override → global (the active/idle interval
+        # state machine is gone — getUpdates long-polls server-side now,
+        # so this only paces retries after failures)
         self.polling_interval_idle = getattr(
             bot_cfg,
             "polling_interval_idle",
@@ -121,8 +187,6 @@ class PollingLoop:
         )
 
         # state trackers
-        self.last_event_time: float = time.time()
-        self.current_interval: int = self.polling_interval_active  # annotate as int
         self.last_update_id: Optional[int] = None
         self._running: bool = True
 
@@ -151,11 +215,13 @@ class PollingLoop:
             raise ValueError(f"Unsupported service '{svc_name}'")
 
         # Set the active service and model for this bot's chat session
-        set_service(self.chat_id, self.bot_name, bot_cfg.default.service)
-        set_model(self.chat_id, self.bot_name, bot_cfg.default.model)
-        set_temperature(self.chat_id, self.bot_name, bot_cfg.default.temperature)
-        set_max_tokens(self.chat_id, self.bot_name, bot_cfg.default.maxtoken)
-        set_think_blocks_on(self.chat_id, self.bot_name, bot_cfg.default.show_think_blocks)
+        # (one session lookup instead of five per-attribute helpers)
+        sess = get_session(self.chat_id, self.bot_name)
+        sess.active_service = bot_cfg.default.service
+        sess.active_model = bot_cfg.default.model
+        sess.model_config.temperature = bot_cfg.default.temperature
+        sess.model_config.max_tokens = bot_cfg.default.maxtoken
+        sess.model_config.think_block_on = bot_cfg.default.show_think_blocks
 
     def stop(self) -> None:
         self._running = False
@@ -167,33 +233,18 @@ class PollingLoop:
                 updates = await self._get_updates_with_retries()
 
                 if updates.get("ok") and updates.get("result"):
-                    for upd in updates["result"]:
+                    # a burst of plain texts from one chat becomes a single
+                    # LLM round-trip instead of one per message; the offset
+                    # advances per coalesced update (not for the whole batch
+                    # up front) so updates after a mid-batch failure are
+                    # redelivered on the next poll
+                    for upd in self._coalesce_updates(updates["result"]):
                         self.last_update_id = upd["update_id"] + 1
                         await self.handle_update(upd)
 
-                    # reset to active interval on activity
-                    self.last_event_time = time.time()
-                    if self.current_interval != self.polling_interval_active:
-                        logger.info(
-                            f"[Poller: Loop] Activity → switching to active interval {self.polling_interval_active}s"
-                        )
-                    self.current_interval = self.polling_interval_active
-
-                else:
-                    idle = time.time() - self.last_event_time
-                    if idle > self.polling_active_period:
-                        new_int = min(
-                            self.current_interval + self.polling_interval_active,
-                            self.polling_interval_idle,
-                        )
-                        if new_int != self.current_interval:
-                            last_seen = datetime.fromtimestamp(self.last_event_time).strftime("%Y-%m-%d %H:%M:%S")
-                            logger.info(
-                                f"[Poller: Loop] No activity for {int(idle)}s (last at {last_seen}), backing off to {new_int}s"
-                            )
-                        self.current_interval = new_int
-
-                await asyncio.sleep(self.current_interval)
+                # no sleep here: the getUpdates call itself blocks up to
+                # _LONG_POLL_TIMEOUT_S server-side and returns early on
+                # activity, so we loop straight back into it
 
             except asyncio.CancelledError:
                 logger.info("[Poller: Loop] Cancelled by shutdown signal.")
@@ -202,6 +253,41 @@ class PollingLoop:
                 logger.exception("[Poller: Loop] Unexpected error, sleeping idle interval")
                 await asyncio.sleep(self.polling_interval_idle)
 
+    @staticmethod
+    def _coalesce_updates(results: list) -> list:
+        """Merge runs of consecutive plain-text messages from the same chat
+        into one update (texts joined with blank lines, up to
+        _BATCH_TEXT_CAP chars). Commands, documents, non-message updates,
+        and chat changes break a run and are handled individually. A merged
+        update carries the run's highest update_id so acknowledging it
+        acknowledges every message folded into it.
+        """
+
+        def _plain_text(upd: Dict[str, Any]) -> Optional[str]:
+            msg = upd.get("message")
+            if not msg or "document" in msg:
+                return None
+            text = msg.get("text")
+            if not text or text.lstrip().startswith("/"):
+                return None
+            return text
+
+        batched: list = []
+        for upd in results:
+            text = _plain_text(upd)
+            if text is not None and batched:
+                prev_text = _plain_text(batched[-1])
+                if (
+                    prev_text is not None
+                    and batched[-1]["message"]["chat"]["id"] == upd["message"]["chat"]["id"]
+                    and len(prev_text) + len(text) <= _BATCH_TEXT_CAP
+                ):
+                    batched[-1]["message"]["text"] = f"{prev_text}\n\n{text}"
+                    batched[-1]["update_id"] = upd["update_id"]
+                    continue
+            batched.append(upd)
+        return batched
+
     async def _get_updates_with_retries(self) -> Dict[str, Any]:
         attempts, max_attempts = 0, 5
         delay = 5
@@ -209,7 +295,10 @@ class PollingLoop:
             attempts += 1
             try:
                 # logger.debug(f"[Poller: Loop] getUpdates attempt {attempts}")
-                return await self.client.get_updates(offset=self.last_update_id)
+                return await self.client.get_updates(
+                    offset=self.last_update_id,
+                    timeout=_LONG_POLL_TIMEOUT_S,
+                )
             except Exception as e:
                 logger.error(f"[Poller: Loop] get_updates failed ({attempts}/{max_attempts}): {e}")
                 if attempts >= max_attempts:
@@ -224,14 +313,21 @@ class PollingLoop:
             return
 
         chat_id = msg["chat"]["id"]
-        # Wrap into session + state
-        session = ChatSession(self.client, chat_id, self.bot_name)
-        state = get_session(chat_id, self.bot_name)
+        # Wrap into session + state; the wrapper is pooled per chat_id so
+        # hot chats don't allocate one per update
+        session = self._chat_sessions.get(chat_id)
+        if session is None:
+            session = self._chat_sessions[chat_id] = ChatSession(self.client, chat_id, self.bot_name)
+        # resolve once per update and reuse below; the wrapper itself
+        # deliberately holds no Session reference (LRU eviction)
+        state = session._session
 
         # ── Init LLM service if missing ───────────────────────
         if state.active_service is None:
-            default = self.config.factorydefault.service or next(iter(self.config.services), None)
-            set_service(chat_id, default, self.bot_name)
+            default = self._bot_def.service or next(iter(self.config.services), None)
+            # direct attribute set on the session we already hold (the old
+            # set_service call here also had its arguments swapped)
+            state.active_service = default
 
         # 1) documents
         if "document" in msg:
@@ -262,27 +358,28 @@ class PollingLoop:
 
         # Commands
         if user_text.startswith("/"):
-            # late import avoids circularity
-            from llm_telegram_bot.telegram.routing import route_message
-
-            await route_message(session=session, message=msg, llm_call=None, model="", temperature=0, maxtoken=0)
+            await self._route_message(session=session, message=msg, llm_call=None, model="", temperature=0, maxtoken=0)
             return
 
         # Paused?
         if is_paused(chat_id, bot_name):
             return
 
-        # Detect language of user input
-        try:
-            language_user = detect(user_text)
-        except LangDetectException:
-            language_user = "unknown"
+        # Detect language of user input (cached on a 200-char prefix;
+        # too-short texts reuse the last detected language)
+        if len(user_text) < _LANG_DETECT_MIN_CHARS:
+            language_user = state.last_lang or "unknown"
+        else:
+            language_user = _detect_lang_cached(user_text[:200])
+            if language_user != "unknown":
+                state.last_lang = language_user
 
-        logger.debug(f"[Poller] Detected language of user text: {language_user}")
+        logger.debug("[Poller] Detected language of user text: %s", language_user)
 
-        # Gather config + persona
+        # Gather config + persona (service can be switched at runtime via
+        # /service, so only the factory default is precomputed)
         svc_name = state.active_service
-        bot_def = self.config.factorydefault
+        bot_def = self._bot_def
         svc_conf = self.config.services[svc_name]
 
         # Build context dict for prompt
@@ -323,7 +420,7 @@ class PollingLoop:
         tokens_full = count_tokens(full_prompt)
 
         # then you log the full prompt
-        logger.debug(f"[Poller] Full prompt hast ({tokens_full} toks)]\n{full_prompt}")
+        logger.debug("[Poller] Full prompt hast (%d toks)]\n%s", tokens_full, full_prompt)
 
         # Send Feedback about Prompt and History
         mgr = session.history_mgr
@@ -337,23 +434,29 @@ class PollingLoop:
             "tier2": len(mgr.tier2),
         }
 
-        await session.send_message(
-            "<b>🔢 History Manager's Token Parameters</b>:\n"
-            # assuming a sentences lenght of 30 tokens
-            f"N0: {caps.N0} msgs max; {caps.T0_cap // 30} sents each\n"
-            f"N1: {caps.N1} msgs max; {caps.T1_cap // 30} sents each\n"
-            f"K:  {caps.K} batches; {caps.T2_cap // 30} sents each\n\n"
-            "<b>🧮 Current Context Usage</b>:\n"
-            f"tier2: {counts['tier2']} ({stats['tier2']} toks)\n"
-            f"tier1: {counts['tier1']} ({stats['tier1']} toks)\n"
-            f"tier0: {counts['tier0']} ({stats['tier0']} toks)\n"
-            f"prompt: {tokens_full} toks\n"
-            f"text: {tokens_user_text} toks",
-            parse_mode="HTML",
+        # fire-and-track: the stats message goes out while the LLM is
+        # thinking instead of adding a Telegram round-trip up front
+        stats_task = asyncio.create_task(
+            session.send_message(
+                "<b>🔢 History Manager's Token Parameters</b>:\n"
+                # assuming a sentences lenght of 30 tokens
+                f"N0: {caps.N0} msgs max; {caps.T0_cap // 30} sents each\n"
+                f"N1: {caps.N1} msgs max; {caps.T1_cap // 30} sents each\n"
+                f"K:  {caps.K} batches; {caps.T2_cap // 30} sents each\n\n"
+                "<b>🧮 Current Context Usage</b>:\n"
+                f"tier2: {counts['tier2']} ({stats['tier2']} toks)\n"
+                f"tier1: {counts['tier1']} ({stats['tier1']} toks)\n"
+                f"tier0: {counts['tier0']} ({stats['tier0']} toks)\n"
+                f"prompt: {tokens_full} toks\n"
+                f"text: {tokens_user_text} toks",
+                parse_mode="HTML",
+            )
         )
 
-        # Record into HistoryManager
-        ts = time.strftime("%Y-%m-%d_%H-%M-%S")
+        # Record into HistoryManager — one datetime per turn, formatted once;
+        # the datetime itself is passed along so nobody has to re-parse ts
+        ts_dt = datetime.now()
+        ts = _format_ts(ts_dt)
 
         # handle if no user definition is chosen
         try:
@@ -369,6 +472,7 @@ class PollingLoop:
             tokens_text=tokens_user_text,
             compressed=user_text,
             tokens_compressed=tokens_user_text,
+            ts_dt=ts_dt,
         )
 
         # Get parameter for calling LLM
@@ -391,9 +495,14 @@ class PollingLoop:
         except Exception as err:
             # report it but do NOT record it in history
             logger.exception("[PollingLoop] LLM API error")
+            await stats_task
             await session.send_message(f"❌ LLM error: {err}")
             return
 
+        # stats message was racing the LLM call; settle it before replying
+        # so the chunks below arrive after it
+        await stats_task
+
         # handle errors that come as message
         if isinstance(reply, str) and reply.startswith("Error from"):
             logger.error(f"[PollingLoop] LLM returned error message in response: {reply}")
@@ -404,17 +513,19 @@ class PollingLoop:
         if think_bool == False:
             reply = strip_think_block(reply)
 
-        # detect reply language
-        try:
-            language_reply = detect(reply)
-        except LangDetectException:
-            language_reply = "unknown"
+        # detect reply language (same cached/short-circuit scheme as above)
+        if len(reply) < _LANG_DETECT_MIN_CHARS:
+            language_reply = state.last_lang or "unknown"
+        else:
+            language_reply = _detect_lang_cached(reply[:200])
+            if language_reply != "unknown":
+                state.last_lang = language_reply
 
-        logger.debug(f"[Poller] Detected language of LLM reply: {language_reply}")
+        logger.debug("[Poller] Detected language of LLM reply: %s", language_reply)
 
         # record LLM reply
         tokens_reply = count_tokens(reply)
-        logger.debug(f"[Poller] Tokens in reply: {tokens_reply}")
+        logger.debug("[Poller] Tokens in reply: %d", tokens_reply)
 
         try:
             name = session.active_char_data["identity"]["name"]
@@ -429,38 +540,22 @@ class PollingLoop:
             tokens_text=tokens_reply,
             compressed=reply,
             tokens_compressed=tokens_reply,
+            ts_dt=ts_dt,
         )
 
         # Send back to user (with splitting)
         for chunk in split_message(reply):
             await session.send_message(chunk)
 
-        # Update HistoryManager (for summarization))
-        session.history_mgr.add_user_message(prompt_msg)
-        session.history_mgr.add_bot_message(reply_msg)
+        # Update HistoryManager (for summarization)) — run in a worker thread
+        # so a TextRank/NER pass over a long message doesn't block polling
+        # for every other bot on this event loop
+        async with _SUMMARIZE_SEM:
+            await asyncio.to_thread(session.history_mgr.add_user_message, prompt_msg)
+            await asyncio.to_thread(session.history_mgr.add_bot_message, reply_msg)
 
         # Append to History Buffer (for recording to file)
-        state.history_buffer.append(
-            {
-                "who": prompt_msg.who,
-                "ts": prompt_msg.ts,
-                "lang": prompt_msg.lang,
-                "text": prompt_msg.text,
-                "tokens_text": prompt_msg.tokens_text,
-                "tokens_compressed": prompt_msg.tokens_compressed,
-            }
-        )
-
-        state.history_buffer.append(
-            {
-                "who": reply_msg.who,
-                "ts": reply_msg.ts,
-                "lang": reply_msg.lang,
-                "text": reply_msg.text,
-                "tokens_text": reply_msg.tokens_text,
-                "tokens_compressed": reply_msg.tokens_compressed,
-            }
-        )
+        state.history_buffer.extend((_msg_to_dict(prompt_msg), _msg_to_dict(reply_msg)))
 
 
 if __name__ == "__main__":
@@ -493,7 +588,11 @@ if __name__ == "__main__":
             tasks.append(asyncio.create_task(poller.run()))
 
         if tasks:
-            await asyncio.gather(*tasks)
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # don't lose the buffered tail on shutdown
+                flush_all_pending()
         else:
             logger.warning("[Main] No bots started; check your config or args.")
 
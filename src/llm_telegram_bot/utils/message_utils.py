@@ -3,9 +3,10 @@
 import datetime
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 from llm_telegram_bot.config.config_loader import load_jailbreaks
+from llm_telegram_bot.config.persona_loader import persona_generation
 from llm_telegram_bot.templates.jinja import render_template
 from llm_telegram_bot.utils.logger import logger
 
@@ -44,12 +45,14 @@ def strip_think_block(text: str) -> str:
     return text_cleaned
 
 
-def split_message(text: str, limit: int = 4096) -> list[str]:
+def split_message(text: str, limit: int = 4096) -> Iterator[str]:
     """
     Splits a long message into chunks suitable for Telegram (max 4096 chars).
     Attempts to split at paragraph or sentence boundaries if possible.
+
+    Yields chunks lazily so callers can start sending the first one
+    without materializing the whole list.
     """
-    chunks: List[str] = []
     while len(text) > limit:
         # Try to split at the last newline before limit
         split_index = text.rfind("\n", 0, limit)
@@ -59,12 +62,11 @@ def split_message(text: str, limit: int = 4096) -> list[str]:
         if split_index == -1:
             split_index = limit  # hard cut
 
-        chunks.append(text[:split_index].strip())
+        yield text[:split_index].strip()
         text = text[split_index:].strip()
 
     if text:
-        chunks.append(text)
-    return chunks
+        yield text
 
 
 # ─── History Summarization Utilities ─────────────────────────────────────
@@ -79,6 +81,41 @@ def summarize_history(history: list[dict]) -> str:
 
 
 # ─── Full Prompt Builder ─────────────────────────────────────────────────
+
+# Rendered jailbreak / user-context blocks that use none of the time
+# placeholders below are invariant per (template, char, user) and cached
+# here, keyed on the personas' stable `key` fields. The whole cache is
+# dropped whenever persona_generation() moves — i.e. any persona file was
+# (re)parsed — which both keeps it bounded and prevents serving a block
+# rendered from pre-edit contents. Templates that do mention a time
+# variable are simply re-rendered every call.
+_static_render_cache: Dict[tuple, str] = {}
+_static_render_generation = -1
+
+
+def _check_render_generation() -> None:
+    global _static_render_generation
+    gen = persona_generation()
+    if gen != _static_render_generation:
+        _static_render_cache.clear()
+        _static_render_generation = gen
+
+_TIME_PLACEHOLDERS = (
+    "now",
+    "last_llm_response_time",
+    "delta_seconds",
+    "day_of_week",
+    "date_",
+    "hour_",
+    "minute_",
+)
+
+
+def _is_time_dependent(tpl: str) -> bool:
+    # substring check: a false positive only costs a re-render
+    return any(name in tpl for name in _TIME_PLACEHOLDERS)
+
+
 def _unique_preserve_order(items: List[str]) -> List[str]:
     """Deduplicate a list of strings (case‐insensitive), preserving first occurrence."""
     seen = set()
@@ -128,32 +165,42 @@ def build_full_prompt(
 
     parts: List[str] = []
 
+    # drop cached prompt blocks if any persona file was reloaded
+    _check_render_generation()
+
     # ── Stage 1: jailbreak/system ────────────────────────────────────────
     rendered_jb = ""
     if isinstance(jailbreak, str):
         jb = load_jailbreaks().get(jailbreak, {})
         tpl = jb.get("prompt", "").strip()
         if tpl:
-            try:
-                rendered_jb = render_template(
-                    tpl,
-                    char=char,
-                    user=user,
-                    now=now,
-                    last_llm_response_time=last,
-                    delta_seconds=delta_seconds,
-                    day_of_week_last=dow_last,
-                    date_last=date_last,
-                    hour_last=hour_last,
-                    minute_last=minute_last,
-                    day_of_week_now=dow_now,
-                    date_now=date_now,
-                    hour_now=hour_now,
-                    minute_now=minute_now,
-                ).strip()
-            except Exception as e:
-                logger.warning(f"[Prompt] Skipping jailbreak render: {e}")
-                logger.debug(f"Failed JB tpl: {tpl}")
+            jb_cache_key = None
+            if not _is_time_dependent(tpl):
+                jb_cache_key = ("jb", jailbreak, char.get("key"), user.get("key"))
+                rendered_jb = _static_render_cache.get(jb_cache_key, "")
+            if not rendered_jb:
+                try:
+                    rendered_jb = render_template(
+                        tpl,
+                        char=char,
+                        user=user,
+                        now=now,
+                        last_llm_response_time=last,
+                        delta_seconds=delta_seconds,
+                        day_of_week_last=dow_last,
+                        date_last=date_last,
+                        hour_last=hour_last,
+                        minute_last=minute_last,
+                        day_of_week_now=dow_now,
+                        date_now=date_now,
+                        hour_now=hour_now,
+                        minute_now=minute_now,
+                    ).strip()
+                    if jb_cache_key is not None and rendered_jb:
+                        _static_render_cache[jb_cache_key] = rendered_jb
+                except Exception as e:
+                    logger.warning(f"[Prompt] Skipping jailbreak render: {e}")
+                    logger.debug(f"Failed JB tpl: {tpl}")
 
     if system_enabled and rendered_jb:
         parts.append(rendered_jb)
@@ -195,27 +242,35 @@ def build_full_prompt(
         # ── Stage 1b: user‐defined [CONTEXT] from user.yaml ─────────────────
     user_ctx_tpl = user.get("context", {}).get("template", "").strip()
     if user_ctx_tpl:
-        try:
-            rendered_user_ctx = render_template(
-                user_ctx_tpl,
-                char=char,
-                user=user,
-                now=now,
-                last_llm_response_time=last,
-                delta_seconds=delta_seconds,
-                day_of_week_last=dow_last,
-                date_last=date_last,
-                hour_last=hour_last,
-                minute_last=minute_last,
-                day_of_week_now=dow_now,
-                date_now=date_now,
-                hour_now=hour_now,
-                minute_now=minute_now,
-            ).strip()
-        except Exception as e:
-            logger.warning(f"[Prompt] Skipping user-context render: {e}")
-            logger.debug(f"Failed USER tpl: {user_ctx_tpl}")
-            rendered_user_ctx = ""
+        ctx_cache_key = None
+        rendered_user_ctx = ""
+        if not _is_time_dependent(user_ctx_tpl):
+            ctx_cache_key = ("ctx", char.get("key"), user.get("key"))
+            rendered_user_ctx = _static_render_cache.get(ctx_cache_key, "")
+        if not rendered_user_ctx:
+            try:
+                rendered_user_ctx = render_template(
+                    user_ctx_tpl,
+                    char=char,
+                    user=user,
+                    now=now,
+                    last_llm_response_time=last,
+                    delta_seconds=delta_seconds,
+                    day_of_week_last=dow_last,
+                    date_last=date_last,
+                    hour_last=hour_last,
+                    minute_last=minute_last,
+                    day_of_week_now=dow_now,
+                    date_now=date_now,
+                    hour_now=hour_now,
+                    minute_now=minute_now,
+                ).strip()
+                if ctx_cache_key is not None and rendered_user_ctx:
+                    _static_render_cache[ctx_cache_key] = rendered_user_ctx
+            except Exception as e:
+                logger.warning(f"[Prompt] Skipping user-context render: {e}")
+                logger.debug(f"Failed USER tpl: {user_ctx_tpl}")
+                rendered_user_ctx = ""
 
         if rendered_user_ctx:
             parts.append("[CONTEXT]")
@@ -2,6 +2,7 @@
 
 import os
 import re
+import threading
 
 import nltk
 import spacy
@@ -13,12 +14,18 @@ from sumy.summarizers.text_rank import TextRankSummarizer
 
 nltk.data.path.append(os.path.join(os.getcwd(), '.venv/nltk_data'))
 
+from functools import lru_cache
 from typing import List
 
 from llm_telegram_bot.utils.logger import logger
+from llm_telegram_bot.utils.token_utils import count_tokens_simple
 
-# Cache for models
+# Cache for models: name -> (Language, Lock). spaCy Language objects are
+# not thread-safe (the tokenizer mutates an internal cache), and the
+# poller's summarize semaphore lets several worker threads reach them at
+# once — each pipeline is serialized behind its own lock.
 _NLP_CACHE = {}
+_NLP_CACHE_GUARD = threading.Lock()
 
 # de_core_news_sm, de_core_news_md, de_core_news_lg, de_core_news_trf
 _GERMAN_MODEL = "de_core_news_md"
@@ -63,20 +70,29 @@ _INTERNAL_CLEAN_RE = re.compile(r"[^\w\s\-']")
 
 def _get_nlp(lang: str):
     """
-    Load or cache a spaCy model for en / de fallback.
+    Load or cache a spaCy model for en / de fallback; returns the
+    (Language, Lock) pair — hold the lock while running the pipeline.
 
     Note: well, de_core_news_md is shit even for German persons and movie names,
     but what you gonna
 
     """
     model = _GERMAN_MODEL if lang.startswith("de") else _ENGLISH_MODEL
-    if model not in _NLP_CACHE:
-        try:
-            _NLP_CACHE[model] = spacy.load(model)
-        except Exception:
-            logger.warning(f"spaCy model {model} not found; falling back to english")
-            _NLP_CACHE[model] = spacy.load("en_core_web_sm")
-    return _NLP_CACHE[model]
+    entry = _NLP_CACHE.get(model)
+    if entry is None:
+        with _NLP_CACHE_GUARD:
+            entry = _NLP_CACHE.get(model)
+            if entry is None:
+                # NER only needs tok2vec+ner (+tagger for the PROPN filter
+                # below); the parser dominates runtime and is dead weight here
+                exclude = ["parser", "lemmatizer", "senter"]
+                try:
+                    nlp = spacy.load(model, exclude=exclude)
+                except Exception:
+                    logger.warning(f"spaCy model {model} not found; falling back to english")
+                    nlp = spacy.load("en_core_web_sm", exclude=exclude)
+                entry = _NLP_CACHE[model] = (nlp, threading.Lock())
+    return entry
 
 
 def extract_named_entities(text: str, lang: str = "english") -> List[str]:
@@ -94,10 +110,12 @@ def extract_named_entities(text: str, lang: str = "english") -> List[str]:
     cleaned = no_bullets.replace("\n", " ").replace("\t", " ")
     cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
 
-    # 2) spaCy NER pass
+    # 2) spaCy NER pass (serialized per pipeline; the resulting Doc is
+    # self-contained, so only the call itself needs the lock)
     code = "de" if lang.startswith("de") else "en"
-    nlp = _get_nlp(code)
-    doc = nlp(cleaned)
+    nlp, nlp_lock = _get_nlp(code)
+    with nlp_lock:
+        doc = nlp(cleaned)
 
     # 3) Choose allowed labels by language
     if code == "de":
@@ -185,6 +203,19 @@ def get_summarizer(method: str):
     return TextRankSummarizer()
 
 
+@lru_cache(maxsize=8)
+def _get_summarize_tools(lang: str, method: str):
+    """
+    Build the sumy Tokenizer + summarizer pair once per (lang, method).
+    Tokenizer construction re-loads the language's stemmer/stopword tables
+    on every call otherwise; the bot only ever uses one or two languages,
+    so cache them. The pair is shared by every worker thread the summarize
+    semaphore admits and neither sumy nor its nltk tokenizer promises
+    thread safety, hence the lock riding along.
+    """
+    return Tokenizer(lang), get_summarizer(method), threading.Lock()
+
+
 def safe_summarize(text: str, num_sentences: int, lang: str = "en", method: str = "lexrank") -> str:
     """
     Try summarizing `text` to `num_sentences` using LexRank (by default).
@@ -193,12 +224,13 @@ def safe_summarize(text: str, num_sentences: int, lang: str = "en", method: str
     for attempt_lang in (lang, "en"):
 
         try:
-            parser = PlaintextParser.from_string(text, Tokenizer(attempt_lang))
+            tokenizer, summarizer, tools_lock = _get_summarize_tools(attempt_lang, method)
 
             # logger.info(f"[Summarizer] Using {method} to summarize text in langugae '{attempt_lang}'")
 
-            summarizer = get_summarizer(method)
-            summary_sentences = summarizer(parser.document, num_sentences)
+            with tools_lock:
+                parser = PlaintextParser.from_string(text, tokenizer)
+                summary_sentences = summarizer(parser.document, num_sentences)
             return " ".join(str(s) for s in summary_sentences)
 
         except Exception as e:
@@ -206,3 +238,14 @@ def safe_summarize(text: str, num_sentences: int, lang: str = "en", method: str
 
     # Give up and return raw
     return text
+
+
+def safe_summarize_with_tokens(text: str, num_sentences: int, lang: str = "en", method: str = "lexrank") -> tuple[str, int]:
+    """
+    Like `safe_summarize`, but also return an approximate token count of the
+    summary. Saves the callers a full tiktoken pass over every summary; the
+    tier budgets are rough (30 toks/sentence) so the word-level approximation
+    is plenty.
+    """
+    summary = safe_summarize(text, num_sentences, lang=lang, method=method)
+    return summary, count_tokens_simple(summary)
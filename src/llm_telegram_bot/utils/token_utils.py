@@ -1,6 +1,7 @@
 # src/llm_telegram_bot/utils/token_utils.py
 
 import re
+from functools import lru_cache
 
 import tiktoken
 
@@ -10,6 +11,15 @@ def count_tokens_simple(text: str) -> int:
     return len(re.findall(r"\w+|[^\s\w]", text))
 
 
+@lru_cache(maxsize=4)
+def _get_encoding(model: str):
+    return tiktoken.encoding_for_model(model)
+
+
+@lru_cache(maxsize=8192)
 def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
-    enc = tiktoken.encoding_for_model(model)
-    return len(enc.encode(text))
+    # memoized: the poller tokenizes the same strings (user text, reply,
+    # summaries) several times per turn, so repeats become dict lookups.
+    # encode_ordinary skips the special-token regex scan we never need
+    # for plain chat text.
+    return len(_get_encoding(model).encode_ordinary(text))
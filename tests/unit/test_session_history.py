@@ -0,0 +1,127 @@
+# tests/unit/test_session_history.py
+
+import json
+from collections import OrderedDict
+
+import orjson
+import pytest
+
+from llm_telegram_bot.session import session_manager as sm
+from llm_telegram_bot.session.session_manager import Session, _migrate_legacy_history
+
+
+def _entry(i: int) -> dict:
+    return {
+        "ts": "2026-08-30_12-00-00",
+        "who": "tester",
+        "lang": "en",
+        "text": f"message {i}",
+        "tokens_text": 2,
+        "tokens_compressed": 2,
+    }
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run each test in its own cwd: history paths are relative."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _make_session(chat_id: int = 1) -> Session:
+    sess = Session(chat_id, "testbot")
+    sess.active_user = "tester"
+    sess.active_char = "char"
+    return sess
+
+
+# ── NDJSON flush / load ──────────────────────────────────────────────
+
+
+def test_flush_writes_ndjson_and_drains_buffer(workdir):
+    sess = _make_session()
+    entries = [_entry(i) for i in range(4)]
+    sess.history_buffer.extend(entries)
+
+    path = sess.flush_history_to_disk()
+
+    assert not sess.history_buffer
+    assert [orjson.loads(line) for line in path.read_bytes().splitlines()] == entries
+    # sibling metadata file rides along
+    assert (path.parent / "tester_with_char.meta.json").exists()
+
+
+def test_flush_load_roundtrip_seeds_tier0(workdir):
+    sess = _make_session()
+    entries = [_entry(i) for i in range(4)]
+    sess.history_buffer.extend(entries)
+    sess.flush_history_to_disk()
+
+    fresh = _make_session()
+    fresh.load_history_from_disk()
+
+    assert [m.text for m in fresh.history_mgr.tier0] == [e["text"] for e in entries]
+
+
+def test_load_without_history_raises(workdir):
+    with pytest.raises(FileNotFoundError):
+        _make_session().load_history_from_disk()
+
+
+# ── legacy single-object migration ───────────────────────────────────
+
+
+def test_legacy_history_migrates_to_ndjson(workdir):
+    hist_dir = workdir / "histories" / "testbot" / "1"
+    hist_dir.mkdir(parents=True)
+    target = hist_dir / "tester_with_char.json"
+    legacy = {
+        "active_service": "groq",
+        "history_buffer": [_entry(0), _entry(1)],
+    }
+    # pretty-printed, as the old json.dump(indent=2) wrote it
+    target.write_text(json.dumps(legacy, indent=2))
+
+    size = _migrate_legacy_history(target)
+
+    lines = target.read_bytes().splitlines()
+    assert [orjson.loads(line) for line in lines] == legacy["history_buffer"]
+    assert size == target.stat().st_size
+    # a second pass is a no-op on the now-NDJSON file
+    assert _migrate_legacy_history(target) == size
+
+
+def test_load_over_legacy_file(workdir):
+    hist_dir = workdir / "histories" / "testbot" / "1"
+    hist_dir.mkdir(parents=True)
+    legacy = {"history_buffer": [_entry(0), _entry(1), _entry(2)]}
+    (hist_dir / "tester_with_char.json").write_text(json.dumps(legacy, indent=2))
+
+    sess = _make_session()
+    sess.load_history_from_disk()
+
+    assert [m.text for m in sess.history_mgr.tier0] == ["message 0", "message 1", "message 2"]
+
+
+# ── LRU eviction flush ───────────────────────────────────────────────
+
+
+def test_lru_eviction_closes_and_flushes(workdir, monkeypatch):
+    monkeypatch.setattr(sm, "_sessions", OrderedDict())
+    monkeypatch.setattr(sm, "MAX_SESSIONS", 1)
+
+    cold = _make_session(chat_id=1)
+    cold.history_on = True
+    cold.history_buffer.append(_entry(0))
+    hot = _make_session(chat_id=2)
+    sm._sessions[(1, "testbot")] = cold
+    sm._sessions[(2, "testbot")] = hot
+
+    sm._evict_lru()
+
+    # coldest entry is gone, the survivor stays
+    assert list(sm._sessions) == [(2, "testbot")]
+    # and its buffered history was persisted on the way out
+    flushed = workdir / "histories" / "testbot" / "1" / "tester_with_char.json"
+    assert orjson.loads(flushed.read_bytes().splitlines()[0])["text"] == "message 0"
+    assert not cold.history_buffer
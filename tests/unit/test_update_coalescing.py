@@ -0,0 +1,49 @@
+# tests/unit/test_update_coalescing.py
+
+import llm_telegram_bot.telegram.poller as poller
+from llm_telegram_bot.telegram.poller import PollingLoop
+
+
+def _upd(update_id: int, chat_id: int, **message) -> dict:
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, **message}}
+
+
+def test_consecutive_texts_merge_with_last_update_id():
+    out = PollingLoop._coalesce_updates(
+        [_upd(1, 1, text="a"), _upd(2, 1, text="b"), _upd(3, 1, text="c")]
+    )
+    assert len(out) == 1
+    assert out[0]["message"]["text"] == "a\n\nb\n\nc"
+    # the merged run is acknowledged via its highest update_id
+    assert out[0]["update_id"] == 3
+
+
+def test_chat_change_breaks_run():
+    out = PollingLoop._coalesce_updates([_upd(1, 1, text="a"), _upd(2, 2, text="b")])
+    assert [u["message"]["text"] for u in out] == ["a", "b"]
+
+
+def test_commands_and_documents_stay_separate():
+    out = PollingLoop._coalesce_updates(
+        [
+            _upd(1, 1, text="a"),
+            _upd(2, 1, text="/help"),
+            _upd(3, 1, text="b"),
+            _upd(4, 1, document={"file_id": "x", "file_name": "f"}, text="caption"),
+            _upd(5, 1, text="c"),
+        ]
+    )
+    # nothing merges across the command or the document
+    assert [u["update_id"] for u in out] == [1, 2, 3, 4, 5]
+
+
+def test_non_message_updates_pass_through():
+    out = PollingLoop._coalesce_updates([_upd(1, 1, text="a"), {"update_id": 2}, _upd(3, 1, text="b")])
+    assert len(out) == 3
+    assert out[1] == {"update_id": 2}
+
+
+def test_merge_respects_size_cap(monkeypatch):
+    monkeypatch.setattr(poller, "_BATCH_TEXT_CAP", 10)
+    out = PollingLoop._coalesce_updates([_upd(1, 1, text="aaaaaa"), _upd(2, 1, text="bbbbbb")])
+    assert [u["message"]["text"] for u in out] == ["aaaaaa", "bbbbbb"]